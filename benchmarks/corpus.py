@@ -0,0 +1,93 @@
+"""
+GreenKode Benchmark Corpus
+--------------------------
+Deterministic generators for synthetic Python code used to benchmark the
+analyzer. The same seed always produces byte-identical sources, so results
+from different commits are comparable.
+"""
+
+import random
+from typing import List, Tuple
+
+# Python's tokenizer rejects more than 100 indentation levels.
+MAX_NESTING = 95
+
+_IMPORTS = [
+    "import os", "import re", "import json", "import numpy as np",
+    "from collections import defaultdict", "import pandas as pd",
+]
+
+
+def _statement(rng: random.Random, indent: str, depth: int) -> List[str]:
+    """One random statement, sometimes a pattern one of the rules detects."""
+    kind = rng.randrange(8)
+    if kind == 0:
+        return [f"{indent}text += str(v{depth})"]
+    if kind == 1:
+        return [f"{indent}m = re.search(r'\\d+', str(v{depth}))"]
+    if kind == 2:
+        return [f"{indent}data[{rng.randrange(100)}] = v{depth} * {rng.randrange(1, 10)}"]
+    if kind == 3:
+        return [f"{indent}total = sum(x for x in range({rng.randrange(2, 50)}) if x % 3)"]
+    if kind == 4:
+        return [f"{indent}result.append({{'k': v{depth}, 'n': len(result)}})"]
+    if kind == 5:
+        return [f"{indent}if v{depth} > {rng.randrange(100)}:", f"{indent}    count += 1"]
+    if kind == 6:
+        return [f"{indent}value = helper_{rng.randrange(10)}(v{depth}, key='{rng.randrange(1000)}')"]
+    return [f"{indent}x, y = divmod(v{depth}, {rng.randrange(1, 10)})"]
+
+
+def _function(rng: random.Random, name: str, max_depth: int = 3) -> List[str]:
+    lines = [f"def {name}(data, result, text='', count=0):"]
+    depth = 0
+    for _ in range(rng.randrange(6, 16)):
+        indent = "    " * (depth + 1)
+        if depth < max_depth and rng.random() < 0.25:
+            loop = rng.choice(["for v{d} in range(len(data)):", "while count < {n}:"])
+            lines.append(indent + loop.format(d=depth + 1, n=rng.randrange(10, 100)))
+            depth += 1
+            lines.append("    " * (depth + 1) + f"v{depth} = count")
+        elif depth and rng.random() < 0.15:
+            depth -= 1
+        else:
+            lines.extend(_statement(rng, indent, depth))
+    lines.append("    return result")
+    lines.append("")
+    return lines
+
+
+def make_module(lines: int, seed: int = 0) -> str:
+    """A module of roughly `lines` lines made of random functions."""
+    rng = random.Random(seed)
+    out = rng.sample(_IMPORTS, 3) + [""]
+    index = 0
+    while len(out) < lines:
+        out.extend(_function(rng, f"func_{index}"))
+        index += 1
+    return "\n".join(out) + "\n"
+
+
+def make_deep_nesting(depth: int = MAX_NESTING, seed: int = 0) -> str:
+    """A single function with `depth` nested blocks (loops, ifs and withs)."""
+    rng = random.Random(seed)
+    depth = min(depth, MAX_NESTING)
+    out = ["import re", "", "def deep(data, result, text='', count=0):", "    v0 = 0"]
+    for level in range(1, depth):
+        indent = "    " * level
+        block = rng.choice([
+            "for v{d} in range(2):", "while count < {d}:", "if v{p} >= 0:", "with open('f{d}') as h{d}:",
+        ])
+        out.append(indent + block.format(d=level, p=level - 1))
+        out.append(indent + f"    v{level} = v{level - 1} + 1")
+        out.extend(_statement(rng, indent + "    ", level))
+    out.append("    " * depth + "return result")
+    return "\n".join(out) + "\n"
+
+
+def make_package(files: int, lines_per_file: int = 50, seed: int = 0) -> List[Tuple[str, str]]:
+    """`files` small modules, as (relative path, source) pairs."""
+    return [
+        (f"pkg_{i // 100}/mod_{i}.py", make_module(lines_per_file, seed=seed * 1_000_003 + i))
+        for i in range(files)
+    ]
@@ -0,0 +1,252 @@
+"""
+GreenKode Analyzer Benchmark
+----------------------------
+Measures CodeInspector throughput on the synthetic corpora from
+benchmarks.corpus: parse and analyze speed (files/sec, nodes/sec), peak
+memory and how a multi-file scan scales with the number of processes.
+
+The regression gate compares two runs on the same machine, normally the
+merge base and HEAD in one CI job:
+    analyze_vs_parse   CodeInspector.analyze() time divided by a bare
+                       ast.parse of the same sources.
+    memory_per_byte    Peak traced memory divided by source size.
+Normalising by ast.parse and source size absorbs most run-to-run noise,
+but the ratios still depend on the CPU and Python version, so results
+from different machines should not be compared. Timings are the best of
+several runs with the garbage collector disabled, as timeit does.
+Process scaling depends on the core count and is reported but not gated.
+
+Usage (from the repository root):
+    python -m benchmarks.run                             # print results
+    python -m benchmarks.run --output before.json        # record a reference run
+    python -m benchmarks.run --check before.json         # fail if worse than it
+
+To benchmark another revision's analyzer with this harness, put its
+source directory first on the path, e.g. PYTHONPATH=../base/src.
+"""
+
+import argparse
+import ast
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+from greenkode.analyzer import CodeInspector
+
+from . import corpus
+
+GATED_METRICS = ("analyze_vs_parse", "memory_per_byte")
+
+PROFILES = {
+    "full": {"deep_files": 300, "module_lines": 50_000, "files": 2_000, "lines_per_file": 50, "processes": (1, 2, 4)},
+    "quick": {"deep_files": 5, "module_lines": 2_000, "files": 50, "lines_per_file": 40, "processes": (1, 2)},
+}
+
+
+def build_corpora(profile: Dict[str, Any]) -> Dict[str, List[Tuple[str, str]]]:
+    """The benchmark corpora as {name: [(relative path, source), ...]}."""
+    return {
+        "deep_nesting": [(f"deep_{i}.py", corpus.make_deep_nesting(seed=i)) for i in range(profile["deep_files"])],
+        "large_module": [("large.py", corpus.make_module(profile["module_lines"]))],
+        "many_files": corpus.make_package(profile["files"], profile["lines_per_file"]),
+    }
+
+
+def write_corpus(root: str, files: List[Tuple[str, str]]) -> List[str]:
+    paths = []
+    for rel_path, source in files:
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+        paths.append(path)
+    return paths
+
+
+def _analyze_file(path: str) -> int:
+    return len(CodeInspector(path).analyze())
+
+
+def _best_of(repeats: int, *funcs) -> List[float]:
+    """
+    Best time of each function. The functions run interleaved within every
+    repeat, so machine noise affects all of them alike.
+    """
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        best = [float("inf")] * len(funcs)
+        for _ in range(repeats):
+            for i, func in enumerate(funcs):
+                start = time.perf_counter()
+                func()
+                best[i] = min(best[i], time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def measure(files: List[Tuple[str, str]], paths: List[str], repeats: int) -> Dict[str, Any]:
+    """Throughput and memory numbers for one corpus."""
+    sources = [source for _, source in files]
+    source_bytes = sum(len(s.encode("utf-8")) for s in sources)
+    lines = sum(s.count("\n") for s in sources)
+    nodes = sum(sum(1 for _ in ast.walk(ast.parse(s))) for s in sources)
+
+    inspectors: List[CodeInspector] = []
+
+    def parse():
+        for source in sources:
+            ast.parse(source)
+
+    def construct():
+        inspectors[:] = [CodeInspector(p) for p in paths]
+
+    def analyze():
+        for inspector in inspectors:
+            inspector.analyze()
+
+    parse_time, construct_time, analyze_time = _best_of(repeats, parse, construct, analyze)
+    issues = sum(len(i.suggestions) for i in inspectors)
+
+    inspectors.clear()
+    gc.collect()
+    tracemalloc.start()
+    for path in paths:
+        CodeInspector(path).analyze()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total_time = construct_time + analyze_time
+    return {
+        "files": len(paths),
+        "lines": lines,
+        "nodes": nodes,
+        "issues": issues,
+        "parse_s": parse_time,
+        "construct_s": construct_time,
+        "analyze_s": analyze_time,
+        "files_per_s": len(paths) / total_time,
+        "lines_per_s": lines / total_time,
+        "parse_nodes_per_s": nodes / parse_time,
+        "analyze_nodes_per_s": nodes / analyze_time,
+        "peak_memory_kb": peak / 1024,
+        "inspect_vs_parse": total_time / parse_time,
+        "analyze_vs_parse": analyze_time / parse_time,
+        "memory_per_byte": peak / source_bytes,
+    }
+
+
+def measure_scaling(paths: List[str], processes: Tuple[int, ...]) -> Dict[str, Any]:
+    """Wall time of analyzing `paths` with a pool of each size."""
+    results = {}
+    base = None
+    for count in processes:
+        with multiprocessing.Pool(count) as pool:
+            pool.map(_analyze_file, paths[:count])  # warm up workers
+            start = time.perf_counter()
+            pool.map(_analyze_file, paths, chunksize=max(1, len(paths) // (count * 8)))
+            elapsed = time.perf_counter() - start
+        base = base or elapsed
+        results[str(count)] = {
+            "wall_s": elapsed,
+            "files_per_s": len(paths) / elapsed,
+            "speedup": base / elapsed,
+            "efficiency": base / elapsed / count,
+        }
+    return results
+
+
+def run_benchmarks(profile_name: str = "full", repeats: int = 7) -> Dict[str, Any]:
+    profile = PROFILES[profile_name]
+    results: Dict[str, Any] = {
+        "profile": profile_name,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "corpora": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, files in build_corpora(profile).items():
+            paths = write_corpus(os.path.join(tmp, name), files)
+            results["corpora"][name] = measure(files, paths, repeats)
+            if name == "many_files":
+                results["scaling"] = measure_scaling(paths, profile["processes"])
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Returns one message per gated metric that regressed beyond `threshold`."""
+    failures = []
+    for name, metrics in results["corpora"].items():
+        reference = baseline.get("corpora", {}).get(name)
+        if not reference:
+            continue
+        for metric in GATED_METRICS:
+            limit = reference[metric] * (1 + threshold)
+            if metrics[metric] > limit:
+                failures.append(
+                    f"{name}.{metric}: {metrics[metric]:.3f} > {limit:.3f} "
+                    f"(baseline {reference[metric]:.3f} +{threshold:.0%})"
+                )
+    return failures
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    header = (
+        f"{'corpus':<14}{'files':>7}{'lines':>9}{'nodes':>10}"
+        f"{'files/s':>10}{'nodes/s':>12}{'peak KB':>10}{'vs parse':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, m in results["corpora"].items():
+        print(
+            f"{name:<14}{m['files']:>7}{m['lines']:>9}{m['nodes']:>10}{m['files_per_s']:>10.1f}"
+            f"{m['analyze_nodes_per_s']:>12.0f}{m['peak_memory_kb']:>10.0f}{m['analyze_vs_parse']:>10.2f}"
+        )
+    print("\nprocesses  files/s  speedup  efficiency")
+    for count, s in results.get("scaling", {}).items():
+        print(f"{count:>9}{s['files_per_s']:>9.1f}{s['speedup']:>9.2f}{s['efficiency']:>12.0%}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the GreenKode analyzer.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="full")
+    parser.add_argument("--repeats", type=int, default=7, help="Timing repeats (best is kept).")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    parser.add_argument("--check", metavar="BASELINE",
+                        help="Exit with 1 if a gated metric regressed against this results file.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression (0.25 = 25%%).")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.profile, args.repeats)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.check:
+        with open(args.check, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("profile") != args.profile:
+            print(f"\nBaseline was recorded with profile '{baseline.get('profile')}', not '{args.profile}'.")
+            return 1
+        failures = compare(results, baseline, args.threshold)
+        if failures:
+            print("\nPerformance regressions:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,25 +3,94 @@ GreenKode Analyzer
 ------------------
 This module performs static analysis on Python code to detect potential
 energy inefficiencies using the Abstract Syntax Tree (AST).
-It loads detection rules dynamically from a JSON database.
+Detection rules are declarative patterns loaded from rules.json (plus any
+installed rule packs), see greenkode.rules for the pattern language.
 """
 
 import ast
+import builtins
 import os
-import json
-from typing import List, Union, Dict, Any
+from typing import List, Union, Dict, Any, Optional, Sequence, Set, Tuple
+
+from .rules import LOOP_NODES, MatchContext, RuleIndex, load_rule_index, record_aliases, resolve_name
+
+# Nodes that open a new scope for import aliases.
+SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+# Calls that make a function's result depend on more than its arguments.
+# Modules are matched together with their submodules; pure helpers such as
+# os.path.join are deliberately not listed.
+IO_CALLS = {
+    "print", "open", "input", "exec", "eval", "io.open",
+    "os.listdir", "os.scandir", "os.walk", "os.stat", "os.open", "os.read", "os.write",
+    "os.remove", "os.unlink", "os.rename", "os.mkdir", "os.makedirs", "os.rmdir",
+    "os.system", "os.popen", "os.getcwd", "os.getenv", "os.environ.get",
+    "os.path.exists", "os.path.isfile", "os.path.isdir", "os.path.getsize", "os.path.getmtime",
+    "sys.stdout.write", "sys.stderr.write", "sys.stdin.read", "sys.stdin.readline",
+}
+IO_MODULES = {"shutil", "socket", "subprocess", "logging", "sqlite3", "urllib", "http", "requests"}
+NONDETERMINISTIC_CALLS = {
+    "time.time", "time.time_ns", "time.monotonic", "time.perf_counter", "time.localtime",
+    "datetime.datetime.now", "datetime.datetime.utcnow", "datetime.datetime.today", "datetime.date.today",
+    "uuid.uuid1", "uuid.uuid4", "os.urandom",
+}
+NONDETERMINISTIC_MODULES = {"random", "secrets"}
+BUILTIN_NAMES = set(dir(builtins))
+
+
+def _in_modules(target: str, modules: Set[str]) -> bool:
+    return any(target == m or target.startswith(m + ".") for m in modules)
+
+
+def _import_names(node: Union[ast.Import, ast.ImportFrom]) -> List[str]:
+    """Names an import statement binds (`import a.b` binds `a`)."""
+    return [alias.asname or alias.name.split(".")[0] for alias in node.names if alias.name != "*"]
+
+
+def _bound_names(func: ast.AST) -> Set[str]:
+    """
+    Names bound anywhere inside a function, including its parameters and
+    nested functions, lambdas and comprehensions.
+    """
+    names: Set[str] = set()
+    for node in ast.walk(func):
+        if node is func:
+            continue
+        if isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update(_import_names(node))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.ExceptHandler)):
+            if node.name:
+                names.add(node.name)
+        elif type(node).__name__ in ("MatchAs", "MatchStar") and node.name:
+            names.add(node.name)
+        elif type(node).__name__ == "MatchMapping" and node.rest:
+            names.add(node.rest)
+    return names
+
+
+class _SafeFormat(dict):
+    """Leaves unknown placeholders in a rule description untouched."""
+    def __missing__(self, key: str) -> str:
+        return "{" + key + "}"
+
 
 class CodeInspector:
     """
     Analyzes code for energy-inefficient patterns using dynamic rules.
     """
-    def __init__(self, source: Union[str, bytes]):
+    def __init__(self, source: Union[str, bytes], rule_files: Optional[Sequence[str]] = None):
         """
         Args:
             source (str | bytes): The source code or filename to analyze.
+            rule_files (Sequence[str]): Extra JSON rule files to load on top of the bundled rules.
         """
         self.suggestions: List[Dict[str, Any]] = []
-        self.rules = self._load_rules()
+        self.index: RuleIndex = load_rule_index(tuple(rule_files or ()))
+        self.rules = self.index.rules
         
         if os.path.exists(source) and os.path.isfile(source):
             with open(source, "r", encoding="utf-8") as f:
@@ -43,104 +112,178 @@ class CodeInspector:
             })
             self.tree = None
 
-    def _load_rules(self) -> Dict[str, Dict[str, str]]:
-        """Loads rules from the data/rules.json file."""
-        rules = {}
-        try:
-            # Locate rules.json relative to this file
-            base_path = os.path.dirname(os.path.abspath(__file__))
-            json_path = os.path.join(base_path, "data", "rules.json")
-            
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                for rule in data:
-                    rules[rule["id"]] = rule
-        except Exception as e:
-            print(f"Warning: Could not load rules.json: {e}")
-        return rules
-
     def _add_issue(self, rule_id: str, node: ast.AST, **kwargs):
         """Helper to add an issue based on a rule ID."""
         rule = self.rules.get(rule_id)
         if rule:
-            message = rule["description"].format(**kwargs)
-            # Calculate depth for nested loop message if needed
-            if rule_id == "GK001" and "depth" in kwargs:
-                 message = message.replace("{depth}", str(kwargs["depth"] + 1))
-
             self.suggestions.append({
                 "id": rule_id,
                 "name": rule["name"],
                 "severity": rule["severity"],
                 "line": node.lineno,
-                "message": message,
+                "message": rule["description"].format_map(_SafeFormat(kwargs)),
                 "remediation": rule["remediation"]
             })
 
     def analyze(self) -> List[Dict[str, Any]]:
         """
-        Runs all detection methods and returns a list of structured suggestions.
+        Runs all detection rules and returns a list of structured suggestions.
         """
         if not self.tree:
             return self.suggestions
-            
-        self.detect_nested_loops(self.tree)
-        self.detect_heavy_imports(self.tree)
-        self.detect_loop_inefficiencies(self.tree)
+
+        self.scan(self.tree)
         return self.suggestions
 
+    def scan(self, node: ast.AST, rule_ids: Optional[Set[str]] = None, loop_depth: int = 0) -> None:
+        """
+        Walks the tree once, checking each node only against the rules
+        indexed for its type. Iterative so deeply nested code cannot hit
+        the recursion limit.
+
+        Args:
+            node (ast.AST): Root of the subtree to scan.
+            rule_ids (Set[str]): Restrict the scan to these rules (all if None).
+            loop_depth (int): Number of loops enclosing `node`.
+        """
+        by_type = self.index.by_type
+        stack = [(node, loop_depth, self._module_aliases())]
+        while stack:
+            current, loop_depth, aliases = stack.pop()
+            if isinstance(current, (ast.Import, ast.ImportFrom)):
+                record_aliases(current, aliases)
+
+            candidates = by_type.get(type(current))
+            if candidates:
+                ctx = MatchContext(current, loop_depth, aliases)
+                for rule in candidates:
+                    if rule_ids is not None and rule.id not in rule_ids:
+                        continue
+                    for captures in rule.match(ctx):
+                        self._add_issue(rule.id, current, **captures)
+
+            if isinstance(current, LOOP_NODES):
+                loop_depth += 1
+            if isinstance(current, SCOPE_NODES):
+                # Imports inside a function or class stay local to it
+                aliases = dict(aliases)
+            children = list(ast.iter_child_nodes(current))
+            stack.extend((child, loop_depth, aliases) for child in reversed(children))
+
+    def _module_aliases(self) -> Dict[str, str]:
+        """
+        Seeds import aliases from module-level imports, so functions defined
+        above an import still resolve it. Nested imports are picked up during
+        the scan itself.
+        """
+        aliases: Dict[str, str] = {}
+        for stmt in getattr(self.tree, "body", []):
+            record_aliases(stmt, aliases)
+        return aliases
+
     def detect_nested_loops(self, node: ast.AST, depth: int = 0) -> None:
-        """Recursively checks for nested loops."""
-        if isinstance(node, (ast.For, ast.While)):
-            if depth > 0:
-                self._add_issue("GK001", node, depth=depth)
-            for child in ast.iter_child_nodes(node):
-                self.detect_nested_loops(child, depth + 1)
-        else:
-            for child in ast.iter_child_nodes(node):
-                self.detect_nested_loops(child, depth)
+        """Checks for nested loops (GK001). `depth` is the number of enclosing loops."""
+        self.scan(node, {"GK001"}, loop_depth=depth)
 
     def detect_heavy_imports(self, node: ast.AST) -> None:
-        """Checks for heavy library imports."""
-        heavy_libs = {"pandas", "tensorflow", "torch", "numpy", "scikit-learn"}
-        
-        for child in ast.walk(node):
-            if isinstance(child, ast.Import):
-                for alias in child.names:
-                    if alias.name in heavy_libs:
-                        self._add_issue("GK002", child, library=alias.name)
-            elif isinstance(child, ast.ImportFrom):
-                if child.module in heavy_libs:
-                    self._add_issue("GK002", child, library=child.module)
+        """Checks for heavy library imports (GK002)."""
+        self.scan(node, {"GK002"})
 
     def detect_loop_inefficiencies(self, node: ast.AST, in_loop: bool = False) -> None:
-        """Checks for inefficient operations inside loops."""
-        if isinstance(node, (ast.For, ast.While)):
-            in_loop = True
-
-        if in_loop:
-            # GK003: String Concatenation
-            if isinstance(node, ast.AugAssign) and isinstance(node.op, ast.Add):
-                is_string_op = False
-                if isinstance(node.value, (ast.Str, ast.Constant)): 
-                    if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
-                        is_string_op = True
-                    elif isinstance(node.value, ast.Str):
-                        is_string_op = True
-                
-                if isinstance(node.target, ast.Name):
-                    if any(hint in node.target.id.lower() for hint in ['str', 'text', 'html', 'json', 'xml', 'csv', 'log', 's']):
-                        is_string_op = True
-
-                if is_string_op:
-                    self._add_issue("GK003", node)
-
-            # GK004: Regex calls
-            if isinstance(node, ast.Call):
-                if isinstance(node.func, ast.Attribute):
-                    if isinstance(node.func.value, ast.Name) and node.func.value.id == 're':
-                        if node.func.attr in {'search', 'match', 'findall', 'sub', 'split'}:
-                            self._add_issue("GK004", node, func=node.func.attr)
-
-        for child in ast.iter_child_nodes(node):
-            self.detect_loop_inefficiencies(child, in_loop)
+        """Checks for inefficient operations inside loops (GK003, GK004)."""
+        self.scan(node, {"GK003", "GK004"}, loop_depth=int(in_loop))
+
+    def function_side_effects(self) -> Dict[Tuple[str, int], List[str]]:
+        """
+        Finds reasons why caching a function's result could change behaviour:
+        reading module-level variables, variables of an enclosing function
+        (closures) or instance state (`self.x` in methods), `global`/`nonlocal`,
+        I/O and non-deterministic calls. Only module-level functions, classes
+        and imports can be read safely; any other name that is not local or
+        a builtin counts as a global read.
+
+        Returns:
+            Dict[Tuple[str, int], List[str]]: Reasons keyed by (function name,
+            first line including decorators), matching the code object's
+            co_name and co_firstlineno. Pure functions map to an empty list.
+        """
+        if not self.tree:
+            return {}
+
+        # Names bound by def/class/import at module level, at any nesting of if/try/with
+        module_defs: Set[str] = set()
+        stack: List[ast.AST] = list(self.tree.body)
+        while stack:
+            node = stack.pop()
+            if isinstance(node, SCOPE_NODES):
+                module_defs.add(node.name)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                module_defs.update(_import_names(node))
+            elif not isinstance(node, ast.Lambda):
+                stack.extend(ast.iter_child_nodes(node))
+
+        # The first parameter of a method (self/cls) carries mutable state
+        owners: Dict[ast.AST, str] = {}
+        for cls in ast.walk(self.tree):
+            if not isinstance(cls, ast.ClassDef):
+                continue
+            for method in cls.body:
+                if not isinstance(method, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    continue
+                decorators = {resolve_name(d, {}) for d in method.decorator_list}
+                params = getattr(method.args, "posonlyargs", []) + method.args.args
+                if params and "staticmethod" not in decorators:
+                    owners[method] = params[0].arg
+
+        module_aliases = self._module_aliases()
+        effects: Dict[Tuple[str, int], List[str]] = {}
+        # (node, names bound by the enclosing functions)
+        scopes: List[Tuple[ast.AST, Set[str]]] = [(self.tree, set())]
+        while scopes:
+            node, enclosing = scopes.pop()
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    bound = _bound_names(child)
+                    first_line = min([child.lineno] + [d.lineno for d in child.decorator_list])
+                    effects[(child.name, first_line)] = self._side_effects_of(
+                        child, bound, enclosing, module_defs, dict(module_aliases), owners.get(child)
+                    )
+                    scopes.append((child, enclosing | bound))
+                else:
+                    scopes.append((child, enclosing))
+        return effects
+
+    def _side_effects_of(self, func: ast.AST, local_names: Set[str], enclosing: Set[str],
+                         module_defs: Set[str], aliases: Dict[str, str],
+                         owner: Optional[str] = None) -> List[str]:
+        for node in ast.walk(func):
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                record_aliases(node, aliases)
+
+        # Decorators, defaults and annotations run once at definition time
+        body = [node for stmt in func.body for node in ast.walk(stmt)]
+        reasons: List[str] = []
+        for node in body:
+            reason = None
+            if isinstance(node, (ast.Global, ast.Nonlocal)):
+                keyword = "global" if isinstance(node, ast.Global) else "nonlocal"
+                reason = f"declares {keyword} {', '.join(node.names)}"
+            elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+                if node.id in local_names or node.id in BUILTIN_NAMES:
+                    pass
+                elif node.id in enclosing:
+                    reason = f"reads closure variable '{node.id}'"
+                elif node.id not in module_defs:
+                    reason = f"reads global '{node.id}'"
+            elif isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Load):
+                if owner and isinstance(node.value, ast.Name) and node.value.id == owner:
+                    reason = f"reads instance state '{owner}.{node.attr}'"
+            elif isinstance(node, ast.Call):
+                target = resolve_name(node.func, aliases) or ""
+                if target in IO_CALLS or _in_modules(target, IO_MODULES):
+                    reason = f"performs I/O ({target})"
+                elif target in NONDETERMINISTIC_CALLS or _in_modules(target, NONDETERMINISTIC_MODULES):
+                    reason = f"is non-deterministic ({target})"
+            if reason and reason not in reasons:
+                reasons.append(reason)
+        return reasons
@@ -10,9 +10,11 @@ import sys
 import subprocess
 import os
 import time
+from typing import List, Optional
 from .analyzer import CodeInspector
 from .engine import GreenEngine
-from .reporter import print_dashboard
+from .memo import MemoProfiler
+from .reporter import print_dashboard, print_memo_report
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
@@ -26,7 +28,10 @@ app = typer.Typer(
 console = Console()
 
 @app.command()
-def check(file_path: str = typer.Argument(..., help="Path to the Python file to analyze.")):
+def check(
+    file_path: str = typer.Argument(..., help="Path to the Python file to analyze."),
+    rules: Optional[List[str]] = typer.Option(None, "--rules", help="Extra JSON rule file(s) to load (repeatable).")
+):
     """
     Perform static analysis on a Python file to detect energy inefficiencies.
     """
@@ -38,7 +43,7 @@ def check(file_path: str = typer.Argument(..., help="Path to the Python file to
 
     with console.status("[bold green]Scanning AST for inefficiencies...[/bold green]", spinner="dots"):
         time.sleep(0.8) # Fake delay for UX (to show off the spinner)
-        inspector = CodeInspector(file_path)
+        inspector = CodeInspector(file_path, rule_files=rules)
         suggestions = inspector.analyze()
 
     if not suggestions:
@@ -69,7 +74,9 @@ def check(file_path: str = typer.Argument(..., help="Path to the Python file to
 def run(
     file_path: str = typer.Argument(..., help="Path to the Python file to execute."),
     region: str = typer.Option(None, "--region", "-r", help="ISO code of the region (e.g., 'US', 'ID') for carbon intensity."),
-    simulate: bool = typer.Option(False, "--simulate", "-s", help="Force simulation mode (useful if no hardware sensors).")
+    simulate: bool = typer.Option(False, "--simulate", "-s", help="Force simulation mode (useful if no hardware sensors)."),
+    find_memo: bool = typer.Option(False, "--find-memo", help="Profile calls in-process and report functions worth caching with lru_cache."),
+    memo_threshold: float = typer.Option(0.5, "--memo-threshold", help="Minimum repeat-argument ratio reported by --find-memo.")
 ):
     """
     Execute a Python file and measure its carbon footprint.
@@ -91,17 +98,23 @@ def run(
         simulate=simulate
     )
 
+    profiler = None
     try:
         with console.status(f"[bold green]Executing {file_path}...[/bold green]", spinner="runner"):
-            # Run the target script as a subprocess
-            result = subprocess.run(
-                [sys.executable, file_path],
-                capture_output=False, # Let stdout/stderr flow to console
-                text=True
-            )
+            if find_memo:
+                # Run in-process so the profiler can see every call
+                profiler = MemoProfiler(os.path.dirname(os.path.abspath(file_path)))
+                returncode = profiler.run_script(file_path)
+            else:
+                # Run the target script as a subprocess
+                returncode = subprocess.run(
+                    [sys.executable, file_path],
+                    capture_output=False, # Let stdout/stderr flow to console
+                    text=True
+                ).returncode
         
-        if result.returncode != 0:
-            console.print(f"\n[bold red]❌ Script exited with error code {result.returncode}[/bold red]")
+        if returncode != 0:
+            console.print(f"\n[bold red]❌ Script exited with error code {returncode}[/bold red]")
 
     except KeyboardInterrupt:
         console.print("\n[bold yellow]⚠️ Execution interrupted by user.[/bold yellow]")
@@ -116,6 +129,12 @@ def run(
             grade = engine.get_grade(emissions_g)
         
         print_dashboard(metrics, grade)
+        if profiler:
+            console.print(
+                "[dim]Note: --find-memo profiles every function call, so the duration, "
+                "energy and grade above include profiling overhead.[/dim]"
+            )
+            print_memo_report(profiler.report(metrics, min_ratio=memo_threshold))
 
 if __name__ == "__main__":
     app()
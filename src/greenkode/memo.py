@@ -0,0 +1,332 @@
+"""
+GreenKode Memoization Finder
+----------------------------
+This module samples calls to user-defined functions at runtime and finds
+functions that are called over and over with the same arguments, i.e.
+candidates for `functools.lru_cache`.
+
+Arguments are reduced to a 16-byte fingerprint, and at most `max_keys`
+fingerprints are kept per function. Memory therefore stays flat on long
+runs, and the profiled program's objects are never kept alive by the
+profiler. Only the thread that starts the profiler is profiled.
+"""
+
+import hashlib
+import inspect
+import os
+import runpy
+import sys
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+from .analyzer import CodeInspector
+
+# Generators and coroutines cannot be cached with lru_cache.
+_NOT_CACHEABLE = inspect.CO_GENERATOR | inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR
+
+# Scalars fingerprinted by value, so hash collisions like hash(-1) == hash(-2)
+# do not count as repeats.
+_SCALARS = (type(None), bool, int, float, complex)
+_MAX_FINGERPRINT_DEPTH = 4
+
+# Fallback power model, same as GreenEngine's simulation mode.
+SIMULATED_POWER_KW = 0.03
+SIMULATED_INTENSITY_KG_PER_KWH = 0.475
+
+
+class FunctionStats:
+    """Call statistics for a single function (code object)."""
+
+    def __init__(self, code):
+        self.name = code.co_name
+        self.filename = code.co_filename
+        self.lineno = code.co_firstlineno
+        self.arg_names = self._arg_names(code)
+        # **kwargs is always the last argument slot
+        self.kwargs_name = self.arg_names[-1] if code.co_flags & inspect.CO_VARKEYWORDS else None
+        self.calls = 0
+        self.sampled = 0
+        self.repeats = 0
+        self.unhashable = 0
+        self.overflow = False
+        self.keys: Dict[bytes, int] = {}
+        # Closures depend on variables outside their arguments (super() adds __class__)
+        self.free_vars = tuple(name for name in code.co_freevars if name != "__class__")
+        self.total_time = 0.0
+        self.repeated_time = 0.0
+        # Active frames, so recursive calls are not timed twice
+        self.depth = 0
+        self.repeat_depth = 0
+
+    @staticmethod
+    def _arg_names(code) -> Tuple[str, ...]:
+        count = code.co_argcount + code.co_kwonlyargcount
+        if code.co_flags & inspect.CO_VARARGS:
+            count += 1
+        if code.co_flags & inspect.CO_VARKEYWORDS:
+            count += 1
+        return code.co_varnames[:count]
+
+    @property
+    def repeat_ratio(self) -> float:
+        """Share of sampled calls whose arguments had been seen before."""
+        return self.repeats / self.sampled if self.sampled else 0.0
+
+    def key_for(self, frame) -> Optional[bytes]:
+        """
+        A fixed-size fingerprint of the call arguments, or None if they
+        cannot be used as an lru_cache key. Any error raised by argument
+        code (e.g. a __hash__ on a half-initialised object) is swallowed so
+        it never escapes into the profiled program.
+        """
+        try:
+            f_locals = frame.f_locals
+            values = []
+            for name in self.arg_names:
+                value = f_locals.get(name)
+                if name == self.kwargs_name:
+                    value = frozenset(value.items())
+                values.append(value)
+            key = tuple(values)
+            hash(key)  # lru_cache needs hashable arguments
+            digest = hashlib.blake2b(digest_size=16)
+            _fingerprint(key, digest, 0)
+            return digest.digest()
+        except Exception:
+            return None
+
+
+class MemoProfiler:
+    """
+    Profiles calls to functions defined under `root` and records how often
+    each one is called with arguments it has already seen.
+
+    Usage:
+        profiler = MemoProfiler("my_project/")
+        with profiler:
+            main()
+        report = profiler.report()
+    """
+
+    def __init__(self, root: str, max_keys: int = 1024, sample_every: int = 1):
+        """
+        Args:
+            root (str): Only functions defined in files under this directory are profiled.
+            max_keys (int): Distinct argument fingerprints kept per function.
+            sample_every (int): Hash and time only every n-th call of each function.
+        """
+        self.root = os.path.abspath(root) + os.sep
+        self.max_keys = max_keys
+        self.sample_every = max(1, sample_every)
+        self.stats: Dict[Any, Optional[FunctionStats]] = {}
+        self.duration = 0.0
+        self._active: Dict[int, Tuple[FunctionStats, float, bool]] = {}
+        self._excluded = os.path.dirname(os.path.abspath(__file__)) + os.sep
+        self._start = 0.0
+
+    def _stats_for(self, code) -> Optional[FunctionStats]:
+        """Returns the stats for a code object, or None if it is not profiled."""
+        try:
+            return self.stats[code]
+        except KeyError:
+            pass
+        # Pseudo-files like "<frozen importlib._bootstrap>" would otherwise
+        # resolve to a path under the current directory
+        filename = code.co_filename
+        path = os.path.abspath(filename)
+        tracked = (
+            not filename.startswith("<")
+            and os.path.isfile(filename)
+            and path.startswith(self.root)
+            and not path.startswith(self._excluded)
+            and "site-packages" not in path
+            and not code.co_name.startswith("<")  # module body, lambdas, comprehensions
+            and not code.co_flags & _NOT_CACHEABLE
+        )
+        stats = FunctionStats(code) if tracked else None
+        self.stats[code] = stats
+        return stats
+
+    def _profile(self, frame, event, arg):
+        if event == "call":
+            stats = self._stats_for(frame.f_code)
+            if stats is None:
+                return
+            stats.calls += 1
+            if (stats.calls - 1) % self.sample_every:
+                return
+            stats.sampled += 1
+            key = stats.key_for(frame)
+            repeat = False
+            if key is None:
+                stats.unhashable += 1
+            elif key in stats.keys:
+                stats.keys[key] += 1
+                stats.repeats += 1
+                repeat = True
+            elif len(stats.keys) < self.max_keys:
+                stats.keys[key] = 1
+            else:
+                stats.overflow = True
+            stats.depth += 1
+            stats.repeat_depth += repeat
+            self._active[id(frame)] = (stats, time.perf_counter(), repeat)
+        elif event == "return":
+            entry = self._active.pop(id(frame), None)
+            if entry is not None:
+                stats, started, repeat = entry
+                elapsed = time.perf_counter() - started
+                stats.depth -= 1
+                stats.repeat_depth -= repeat
+                if not stats.depth:
+                    stats.total_time += elapsed
+                if repeat and not stats.repeat_depth:
+                    stats.repeated_time += elapsed
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+        sys.setprofile(self._profile)
+
+    def stop(self) -> None:
+        sys.setprofile(None)
+        self.duration += time.perf_counter() - self._start
+        for stats, _, repeat in self._active.values():
+            stats.depth -= 1
+            stats.repeat_depth -= repeat
+        self._active.clear()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def run_script(self, file_path: str) -> int:
+        """
+        Runs a Python file as __main__ in this process while profiling it.
+        An uncaught exception is printed with its traceback, like the
+        interpreter would, and gives exit code 1.
+
+        Returns:
+            int: The script's exit code.
+        """
+        file_path = os.path.abspath(file_path)
+        saved_argv, saved_path = sys.argv[:], sys.path[:]
+        sys.argv = [file_path]
+        sys.path.insert(0, os.path.dirname(file_path))
+        try:
+            with self:
+                runpy.run_path(file_path, run_name="__main__")
+        except SystemExit as e:
+            if e.code is None:
+                return 0
+            return e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            return 1
+        finally:
+            sys.argv, sys.path[:] = saved_argv, saved_path
+        return 0
+
+    def report(self, metrics: Optional[Dict[str, Any]] = None, min_ratio: float = 0.5,
+               min_calls: int = 20) -> List[Dict[str, Any]]:
+        """
+        Lists memoization candidates, most wasteful first.
+
+        Args:
+            metrics (Dict[str, Any]): GreenEngine metrics for the run, used to turn
+                time into energy and emissions. The simulation power model is used
+                if no energy was measured.
+            min_ratio (float): Minimum repeat-argument ratio to report.
+            min_calls (int): Minimum number of calls to report.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per candidate function.
+        """
+        metrics = metrics or {}
+        energy_kwh = metrics.get("cpu_energy") or 0.0
+        emissions_kg = metrics.get("emissions_kg") or 0.0
+        duration = metrics.get("duration") or self.duration
+        if not energy_kwh and duration:
+            energy_kwh = SIMULATED_POWER_KW * duration / 3600.0
+            emissions_kg = energy_kwh * SIMULATED_INTENSITY_KG_PER_KWH
+
+        effects_by_file: Dict[str, Dict[Tuple[str, int], List[str]]] = {}
+        candidates = []
+        for stats in self.stats.values():
+            if stats is None or stats.calls < min_calls or stats.repeat_ratio < min_ratio:
+                continue
+
+            # Scale sampled timings back up to all calls
+            scale = stats.calls / stats.sampled
+            repeated_time = stats.repeated_time * scale
+            share = repeated_time / duration if duration else 0.0
+
+            if stats.filename not in effects_by_file:
+                effects_by_file[stats.filename] = (
+                    CodeInspector(stats.filename).function_side_effects() if os.path.isfile(stats.filename) else {}
+                )
+            reasons = list(effects_by_file[stats.filename].get((stats.name, stats.lineno), []))
+            for name in stats.free_vars:
+                reason = f"reads closure variable '{name}'"
+                if reason not in reasons:
+                    reasons.append(reason)
+
+            candidates.append({
+                "name": stats.name,
+                "location": f"{os.path.relpath(stats.filename)}:{stats.lineno}",
+                "calls": stats.calls,
+                "repeat_ratio": stats.repeat_ratio,
+                "unhashable_calls": stats.unhashable,
+                "total_time": stats.total_time * scale,
+                "repeated_time": repeated_time,
+                "repeated_energy_kwh": energy_kwh * share,
+                "repeated_emissions_g": emissions_kg * share * 1000,
+                # A cache hit costs roughly a dict lookup, so repeated calls are almost all saved.
+                "estimated_saving_s": repeated_time,
+                # Past max_keys unseen arguments are not tracked, so repeats (and savings) are
+                # undercounted; suggest a bounded cache rather than an unbounded one.
+                "suggested_maxsize": self.max_keys if stats.overflow else _next_power_of_two(len(stats.keys)),
+                "lower_bound": stats.overflow,
+                "safe": not reasons,
+                "reasons": reasons,
+            })
+
+        candidates.sort(key=lambda c: c["repeated_time"], reverse=True)
+        return candidates
+
+
+def _fingerprint(value: Any, digest: Any, depth: int) -> None:
+    """Feeds a type-tagged encoding of `value` into `digest`."""
+    kind = type(value)
+    digest.update(kind.__qualname__.encode() + b"\0")
+    if kind in _SCALARS:
+        digest.update(repr(value).encode())
+    elif kind is str:
+        data = value.encode("utf-8", "surrogatepass")
+        digest.update(len(data).to_bytes(8, "little") + data)
+    elif kind is bytes:
+        digest.update(len(value).to_bytes(8, "little") + value)
+    elif kind is tuple and depth < _MAX_FINGERPRINT_DEPTH:
+        digest.update(len(value).to_bytes(8, "little"))
+        for item in value:
+            _fingerprint(item, digest, depth + 1)
+    elif kind is frozenset and depth < _MAX_FINGERPRINT_DEPTH:
+        items = []
+        for item in value:
+            sub = hashlib.blake2b(digest_size=16)
+            _fingerprint(item, sub, depth + 1)
+            items.append(sub.digest())
+        digest.update(len(items).to_bytes(8, "little") + b"".join(sorted(items)))
+    else:
+        # Other objects are compared through their own __hash__
+        digest.update(hash(value).to_bytes(8, "little", signed=True))
+
+
+def _next_power_of_two(n: int) -> int:
+    size = 1
+    while size < n:
+        size *= 2
+    return size
@@ -13,7 +13,7 @@ from rich.layout import Layout
 from rich.text import Text
 from rich.align import Align
 from rich.console import Group
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 console = Console()
 
@@ -103,3 +103,41 @@ def print_dashboard(metrics: Dict[str, Any], grade: str) -> None:
 
     console.print("\n")
     console.print(final_dashboard)
+
+
+def print_memo_report(candidates: List[Dict[str, Any]]) -> None:
+    """
+    Displays functions that are repeatedly called with the same arguments.
+
+    Args:
+        candidates (List[Dict[str, Any]]): Entries from MemoProfiler.report().
+    """
+    if not candidates:
+        console.print(Panel("[bold green]✅ No memoization opportunities found.[/bold green]", border_style="green"))
+        return
+
+    table = Table(title="[bold yellow]♻️ Memoization Opportunities[/bold yellow]", border_style="yellow", show_lines=True)
+    table.add_column("Function", style="cyan")
+    table.add_column("Calls", justify="right")
+    table.add_column("Repeats", justify="right")
+    table.add_column("Wasted", justify="right")
+    table.add_column("Suggestion", style="green", overflow="fold")
+
+    for c in candidates:
+        maxsize = c["suggested_maxsize"]
+        # Past the tracked argument sets, repeats and savings are undercounted
+        at_least = "≥ " if c["lower_bound"] else ""
+        if c["safe"]:
+            suggestion = f"@functools.lru_cache(maxsize={maxsize})\nSaves {at_least or '~'}{c['estimated_saving_s']:.4f} s"
+        else:
+            suggestion = "[red]Unsafe to cache:[/red] " + "; ".join(c["reasons"])
+
+        table.add_row(
+            f"{c['name']}\n[dim]{c['location']}[/dim]",
+            str(c["calls"]),
+            f"{at_least}{c['repeat_ratio']:.0%}",
+            f"{c['repeated_time']:.4f} s\n{c['repeated_energy_kwh']:.2e} kWh\n{c['repeated_emissions_g']:.2e} gCO2",
+            suggestion
+        )
+
+    console.print(table)
@@ -0,0 +1,392 @@
+"""
+GreenKode Rules
+---------------
+This module turns the declarative patterns stored in rules.json (and in
+user or third-party rule packs) into matchers that the analyzer can run.
+
+Every rule is compiled once and indexed by the AST node types it can
+match, so a scan only evaluates the candidate rules for each node it visits.
+
+Pattern keys (all optional unless noted):
+    node                  Concrete AST class name(s), e.g. "Call" or ["For", "While"].
+                          Required unless "call" is given (which implies "Call").
+    call                  Alias-resolved call target(s), glob syntax allowed,
+                          e.g. "re.search" or "re.*".
+    module                Alias-resolved module(s) of an import or call target.
+                          Submodules match too ("numpy" matches "numpy.linalg").
+    inside_loop           true/false: node must (not) be inside a for/while loop.
+    min_loop_depth        Minimum number of enclosing loops.
+    op                    Operator class name(s) for AugAssign/BinOp, e.g. "Add".
+    value_type            Type name(s) of a constant `value`, e.g. "str".
+    target_name_contains  Hints searched in the lower-cased assignment target name.
+    any                   List of sub-patterns (without "node"); one must match.
+
+Matched values are available to the rule description as {depth}, {call},
+{func}, {module} and {library}.
+"""
+
+import ast
+import fnmatch
+import functools
+import json
+import os
+import string
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+ENTRY_POINT_GROUP = "greenkode.rules"
+LOOP_NODES = (ast.For, ast.While)
+
+# Deprecated node classes the parser never produces.
+_DEPRECATED_NODES = {
+    "Str", "Num", "Bytes", "NameConstant", "Ellipsis", "Index", "ExtSlice",
+    "Suite", "Param", "AugLoad", "AugStore", "slice",
+}
+
+
+def _concrete_node_types() -> Dict[str, type]:
+    """
+    AST classes the parser actually builds. Rules are looked up by exact
+    node type, so abstract bases like `stmt` or `expr` would never match.
+    """
+    # Private helpers (e.g. `_ast_Ellipsis`, a Constant subclass on 3.12+) are
+    # skipped too, or they would make their base look abstract.
+    classes = {
+        name: cls for name, cls in vars(ast).items()
+        if isinstance(cls, type) and issubclass(cls, ast.AST)
+        and not name.startswith("_") and name not in _DEPRECATED_NODES
+    }
+    bases = {base for cls in classes.values() for base in cls.__bases__}
+    return {name: cls for name, cls in classes.items() if cls not in bases}
+
+
+CONCRETE_NODE_TYPES = _concrete_node_types()
+
+_REQUIRED_RULE_KEYS = ("id", "name", "severity", "description", "remediation")
+
+_PATTERN_KEYS = {
+    "node", "call", "module", "inside_loop", "min_loop_depth",
+    "op", "value_type", "target_name_contains", "any",
+}
+
+
+class RulePatternError(ValueError):
+    """Raised when a rule carries a malformed match pattern."""
+
+
+class MatchContext:
+    """
+    The state a pattern sees for a single node: the node itself, how many
+    loops enclose it, and the import aliases known at that point of the scan.
+    Derived values are computed lazily and shared by all candidate rules.
+    """
+    _UNSET = object()
+
+    def __init__(self, node: ast.AST, loop_depth: int, aliases: Dict[str, str]):
+        self.node = node
+        self.loop_depth = loop_depth
+        self.aliases = aliases
+        self._call_target = self._UNSET
+
+    @property
+    def call_target(self) -> Optional[str]:
+        """Dotted, alias-resolved name of the called function (Call nodes only)."""
+        if self._call_target is self._UNSET:
+            self._call_target = None
+            if isinstance(self.node, ast.Call):
+                self._call_target = resolve_name(self.node.func, self.aliases)
+        return self._call_target
+
+    def modules(self) -> List[str]:
+        """Modules referenced by the node, resolved through import aliases."""
+        node = self.node
+        if isinstance(node, ast.Import):
+            return [alias.name for alias in node.names]
+        if isinstance(node, ast.ImportFrom):
+            return [_import_from_module(node)]
+        target = self.call_target
+        if target and "." in target:
+            return [target.rsplit(".", 1)[0]]
+        return []
+
+    def captures(self) -> Dict[str, Any]:
+        """Values exposed to the rule description."""
+        depth = self.loop_depth + (1 if isinstance(self.node, LOOP_NODES) else 0)
+        captures: Dict[str, Any] = {"depth": depth}
+        target = self.call_target
+        if target:
+            captures["call"] = target
+            captures["func"] = target.rsplit(".", 1)[-1]
+        return captures
+
+
+def resolve_name(node: ast.AST, aliases: Dict[str, str]) -> Optional[str]:
+    """
+    Resolves `r.search` to `re.search` after `import re as r`, or `search`
+    to `re.search` after `from re import search`. Unknown roots are kept as-is.
+    """
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(aliases.get(node.id, node.id))
+    return ".".join(reversed(parts))
+
+
+def record_aliases(node: ast.AST, aliases: Dict[str, str]) -> None:
+    """Updates `aliases` with the names bound by an import statement."""
+    if isinstance(node, ast.Import):
+        for alias in node.names:
+            if alias.asname:
+                aliases[alias.asname] = alias.name
+            else:
+                root = alias.name.split(".", 1)[0]
+                aliases[root] = root
+    elif isinstance(node, ast.ImportFrom):
+        module = _import_from_module(node)
+        for alias in node.names:
+            if alias.name != "*":
+                aliases[alias.asname or alias.name] = f"{module}.{alias.name}"
+
+
+def _import_from_module(node: ast.ImportFrom) -> str:
+    return "." * (node.level or 0) + (node.module or "")
+
+
+def _as_list(value: Any, key: str, rule_id: str, item_type: type = str) -> List[Any]:
+    values = value if isinstance(value, list) else [value]
+    if not values:
+        raise RulePatternError(f"Rule {rule_id}: '{key}' must not be empty.")
+    for item in values:
+        if not isinstance(item, item_type):
+            raise RulePatternError(f"Rule {rule_id}: '{key}' entries must be of type {item_type.__name__}.")
+    return values
+
+
+def validate_rule(rule: Any) -> None:
+    """Checks the metadata every rule needs before it can be reported."""
+    if not isinstance(rule, dict):
+        raise RulePatternError(f"Rule must be an object, got {type(rule).__name__}.")
+    rule_id = rule.get("id", "<missing id>")
+    for key in _REQUIRED_RULE_KEYS:
+        if not isinstance(rule.get(key), str):
+            raise RulePatternError(f"Rule {rule_id}: '{key}' is required and must be a string.")
+    try:
+        list(string.Formatter().parse(rule["description"]))
+    except ValueError as e:
+        raise RulePatternError(f"Rule {rule_id}: invalid description template ({e}).")
+
+
+def _module_matches(module: str, wanted: Sequence[str]) -> bool:
+    return any(module == name or module.startswith(name + ".") for name in wanted)
+
+
+def _compile_checks(pattern: Dict[str, Any], rule_id: str) -> List[Callable[[MatchContext], bool]]:
+    """Compiles the non-structural keys of a pattern into predicate functions."""
+    unknown = set(pattern) - _PATTERN_KEYS
+    if unknown:
+        raise RulePatternError(f"Rule {rule_id}: unknown pattern key(s) {sorted(unknown)}.")
+
+    checks: List[Callable[[MatchContext], bool]] = []
+
+    if "inside_loop" in pattern:
+        wanted = pattern["inside_loop"]
+        if not isinstance(wanted, bool):
+            raise RulePatternError(f"Rule {rule_id}: 'inside_loop' must be true or false.")
+        checks.append(lambda ctx: (ctx.loop_depth > 0) == wanted)
+
+    if "min_loop_depth" in pattern:
+        minimum = pattern["min_loop_depth"]
+        if isinstance(minimum, bool) or not isinstance(minimum, int):
+            raise RulePatternError(f"Rule {rule_id}: 'min_loop_depth' must be an integer.")
+        checks.append(lambda ctx: ctx.loop_depth >= minimum)
+
+    if "op" in pattern:
+        ops = set(_as_list(pattern["op"], "op", rule_id))
+        checks.append(lambda ctx: type(getattr(ctx.node, "op", None)).__name__ in ops)
+
+    if "value_type" in pattern:
+        types = set(_as_list(pattern["value_type"], "value_type", rule_id))
+
+        def check_value_type(ctx: MatchContext) -> bool:
+            value = getattr(ctx.node, "value", None)
+            return isinstance(value, ast.Constant) and type(value.value).__name__ in types
+        checks.append(check_value_type)
+
+    if "target_name_contains" in pattern:
+        hints = [h.lower() for h in _as_list(pattern["target_name_contains"], "target_name_contains", rule_id)]
+
+        def check_target_name(ctx: MatchContext) -> bool:
+            target = getattr(ctx.node, "target", None)
+            if not isinstance(target, ast.Name):
+                return False
+            name = target.id.lower()
+            return any(hint in name for hint in hints)
+        checks.append(check_target_name)
+
+    if "call" in pattern:
+        calls = _as_list(pattern["call"], "call", rule_id)
+        exact = {c for c in calls if not any(ch in c for ch in "*?[")}
+        globs = [c for c in calls if c not in exact]
+
+        def check_call(ctx: MatchContext) -> bool:
+            target = ctx.call_target
+            if target is None:
+                return False
+            return target in exact or any(fnmatch.fnmatchcase(target, g) for g in globs)
+        checks.append(check_call)
+
+    if "any" in pattern:
+        alternatives = []
+        for sub in _as_list(pattern["any"], "any", rule_id, dict):
+            if "node" in sub:
+                raise RulePatternError(f"Rule {rule_id}: 'any' entries must be patterns without 'node'.")
+            sub_checks = _compile_checks(sub, rule_id)
+            if "module" in sub:
+                wanted_modules = _as_list(sub["module"], "module", rule_id)
+                sub_checks.append(lambda ctx, w=wanted_modules: any(_module_matches(m, w) for m in ctx.modules()))
+            alternatives.append(sub_checks)
+        checks.append(lambda ctx: any(all(check(ctx) for check in alt) for alt in alternatives))
+
+    return checks
+
+
+class CompiledRule:
+    """A rule from rules.json together with its compiled match pattern."""
+
+    def __init__(self, rule: Dict[str, Any]):
+        validate_rule(rule)
+        self.id = rule["id"]
+        self.rule = rule
+        pattern = rule.get("match")
+        if not isinstance(pattern, dict):
+            raise RulePatternError(f"Rule {self.id}: 'match' must be an object.")
+
+        node_names = pattern.get("node", "Call" if "call" in pattern else None)
+        if node_names is None:
+            raise RulePatternError(f"Rule {self.id}: pattern needs a 'node' (or 'call') key.")
+
+        self.node_types: Tuple[type, ...] = ()
+        for name in _as_list(node_names, "node", self.id):
+            node_type = CONCRETE_NODE_TYPES.get(name)
+            if node_type is None:
+                raise RulePatternError(f"Rule {self.id}: '{name}' is not a concrete AST node type.")
+            self.node_types += (node_type,)
+
+        self.modules: Optional[List[str]] = None
+        if "module" in pattern:
+            self.modules = _as_list(pattern["module"], "module", self.id)
+        self.checks = _compile_checks(pattern, self.id)
+
+    def match(self, ctx: MatchContext) -> List[Dict[str, Any]]:
+        """
+        Returns one capture dict per match (an import statement can match once
+        per imported module), or an empty list if the node does not match.
+        """
+        for check in self.checks:
+            if not check(ctx):
+                return []
+
+        captures = ctx.captures()
+        modules = ctx.modules()
+        if self.modules is not None:
+            modules = [m for m in modules if _module_matches(m, self.modules)]
+            if not modules:
+                return []
+        if not modules:
+            return [captures]
+        return [dict(captures, module=m, library=m) for m in modules]
+
+
+class RuleIndex:
+    """
+    All known rules, with the ones carrying a 'match' pattern indexed by
+    AST node type.
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]]):
+        self.rules: Dict[str, Dict[str, Any]] = {}
+        compiled_rules: Dict[str, CompiledRule] = {}
+        for rule in rules:
+            # A malformed rule is skipped; an earlier rule with the same id stays active
+            try:
+                if isinstance(rule, dict) and "match" in rule:
+                    compiled_rules[rule["id"]] = CompiledRule(rule)
+                else:
+                    validate_rule(rule)
+                    compiled_rules.pop(rule["id"], None)
+            except RulePatternError as e:
+                print(f"Warning: Skipping rule: {e}")
+                continue
+            self.rules[rule["id"]] = rule  # later packs override earlier ones
+
+        self.by_type: Dict[type, List[CompiledRule]] = {}
+        for compiled in compiled_rules.values():
+            for node_type in compiled.node_types:
+                self.by_type.setdefault(node_type, []).append(compiled)
+
+
+def load_rule_file(path: str) -> List[Dict[str, Any]]:
+    """Reads a JSON rule file (a list of rule objects)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise RulePatternError(f"{path}: expected a list of rules.")
+    return data
+
+
+def _iter_entry_points(group: str) -> List[Any]:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        return []
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=group))
+    return list(eps.get(group, []))
+
+
+def load_entry_point_rules() -> List[Dict[str, Any]]:
+    """
+    Loads third-party rule packs registered under the 'greenkode.rules'
+    entry point group. An entry point may resolve to a path to a JSON file,
+    a list of rule dicts, or a callable returning either.
+    """
+    rules: List[Dict[str, Any]] = []
+    for ep in _iter_entry_points(ENTRY_POINT_GROUP):
+        try:
+            pack = ep.load()
+            if callable(pack):
+                pack = pack()
+            if isinstance(pack, (str, os.PathLike)):
+                pack = load_rule_file(os.fspath(pack))
+            rules.extend(pack)
+        except Exception as e:
+            print(f"Warning: Could not load rule pack '{ep.name}': {e}")
+    return rules
+
+
+def builtin_rules_path() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rules.json")
+
+
+@functools.lru_cache(maxsize=None)
+def load_rule_index(rule_files: Tuple[str, ...] = ()) -> RuleIndex:
+    """
+    Builds the rule index from the bundled rules.json, installed rule packs
+    and any extra rule files, in that order. Cached so each combination is
+    compiled only once per process.
+    """
+    rules: List[Dict[str, Any]] = []
+    try:
+        rules.extend(load_rule_file(builtin_rules_path()))
+    except Exception as e:
+        print(f"Warning: Could not load rules.json: {e}")
+    rules.extend(load_entry_point_rules())
+    for path in rule_files:
+        try:
+            rules.extend(load_rule_file(path))
+        except Exception as e:
+            print(f"Warning: Could not load rule file '{path}': {e}")
+    return RuleIndex(rules)
@@ -0,0 +1,45 @@
+import ast
+
+from benchmarks import corpus, run
+from benchmarks.run import compare
+
+
+def test_corpus_is_deterministic_and_valid():
+    assert corpus.make_module(300, seed=1) == corpus.make_module(300, seed=1)
+    assert corpus.make_module(300, seed=1) != corpus.make_module(300, seed=2)
+    ast.parse(corpus.make_module(300))
+
+    deep = corpus.make_deep_nesting()
+    ast.parse(deep)
+    assert "    " * corpus.MAX_NESTING + "return result" in deep
+
+    package = corpus.make_package(5, 30)
+    assert len({path for path, _ in package}) == 5
+    for _, source in package:
+        ast.parse(source)
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"corpora": {"large_module": {"analyze_vs_parse": 2.0, "memory_per_byte": 10.0}}}
+    ok = {"corpora": {"large_module": {"analyze_vs_parse": 2.4, "memory_per_byte": 9.0}}}
+    slow = {"corpora": {"large_module": {"analyze_vs_parse": 2.6, "memory_per_byte": 9.0}}}
+
+    assert compare(ok, baseline, 0.25) == []
+    failures = compare(slow, baseline, 0.25)
+    assert len(failures) == 1
+    assert failures[0].startswith("large_module.analyze_vs_parse")
+
+
+def test_run_benchmarks_on_a_tiny_profile(monkeypatch):
+    tiny = {"deep_files": 1, "module_lines": 50, "files": 3, "lines_per_file": 20, "processes": (1,)}
+    monkeypatch.setitem(run.PROFILES, "tiny", tiny)
+
+    results = run.run_benchmarks("tiny", repeats=1)
+    assert results["profile"] == "tiny"
+    assert set(results["corpora"]) == {"deep_nesting", "large_module", "many_files"}
+    for metrics in results["corpora"].values():
+        for metric in run.GATED_METRICS + ("files_per_s", "peak_memory_kb"):
+            assert metrics[metric] > 0
+    assert results["corpora"]["many_files"]["files"] == 3
+    assert set(results["scaling"]) == {"1"}
+    assert compare(results, results, 0.0) == []
@@ -0,0 +1,289 @@
+import gc
+import os
+import weakref
+
+from greenkode.analyzer import CodeInspector
+from greenkode.memo import MemoProfiler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def square(x):
+    return x * x
+
+
+def total(items):
+    return sum(items)
+
+
+def lookup(mapping):
+    return len(mapping)
+
+
+def neg(x):
+    return -x
+
+
+def options(x, **kwargs):
+    return x
+
+
+def identity(x):
+    return x
+
+
+def keywords(**kw):
+    return len(kw)
+
+
+class Point:
+    def __init__(self, x):
+        self.x = x
+
+    def __hash__(self):
+        return hash(self.x)
+
+    def __eq__(self, other):
+        return self.x == other.x
+
+
+class Box:
+    pass
+
+
+def test_repeated_arguments_are_reported():
+    profiler = MemoProfiler(HERE)
+    with profiler:
+        for i in range(100):
+            square(i % 4)
+            square(i + 1000)
+            total([i])
+
+    stats = {s.name: s for s in profiler.stats.values() if s}
+    assert stats["square"].calls == 200
+    assert stats["square"].repeats == 96
+    assert stats["total"].unhashable == 100
+
+    report = profiler.report(min_ratio=0.4)
+    assert [c["name"] for c in report] == ["square"]
+    assert report[0]["safe"]
+    assert report[0]["suggested_maxsize"] == 128
+
+
+def test_argument_hashes_are_bounded():
+    profiler = MemoProfiler(HERE, max_keys=8)
+    with profiler:
+        for i in range(50):
+            square(i)
+            square(0)
+
+    stats = next(s for s in profiler.stats.values() if s and s.name == "square")
+    assert len(stats.keys) == 8
+    assert stats.overflow
+    report = profiler.report(min_ratio=0.4)[0]
+    assert report["suggested_maxsize"] == 8
+    assert report["lower_bound"]
+
+
+def test_dict_arguments_are_unhashable_but_kwargs_are_not():
+    profiler = MemoProfiler(HERE)
+    with profiler:
+        for _ in range(40):
+            lookup({"a": 1})
+            options(1, flag=True)
+
+    stats = {s.name: s for s in profiler.stats.values() if s}
+    assert (stats["lookup"].unhashable, stats["lookup"].repeats) == (40, 0)
+    assert (stats["options"].unhashable, stats["options"].repeats) == (0, 39)
+    assert [c["name"] for c in profiler.report()] == ["options"]
+
+
+def test_hash_collisions_are_not_repeats():
+    assert hash(-1) == hash(-2)
+    profiler = MemoProfiler(HERE)
+    with profiler:
+        for i in range(40):
+            neg(-1 - i % 2)
+
+    stats = next(s for s in profiler.stats.values() if s and s.name == "neg")
+    assert stats.repeats == 38
+    assert len(stats.keys) == 2
+
+
+def test_argument_errors_do_not_reach_the_program():
+    profiler = MemoProfiler(HERE)
+    with profiler:
+        points = [Point(1) for _ in range(3)]  # self is hashed before __init__ sets x
+        sizes = [keywords(x=[1]) for _ in range(3)]
+
+    assert [p.x for p in points] == [1, 1, 1]
+    assert sizes == [1, 1, 1]
+    stats = {s.name: s for s in profiler.stats.values() if s}
+    assert stats["__init__"].unhashable == 3
+    assert stats["keywords"].unhashable == 3
+
+
+def test_arguments_are_not_kept_alive():
+    box = Box()
+    ref = weakref.ref(box)
+    profiler = MemoProfiler(HERE)
+    with profiler:
+        for _ in range(3):
+            identity(box)
+
+    stats = next(s for s in profiler.stats.values() if s and s.name == "identity")
+    assert stats.repeats == 2
+    assert all(len(key) == 16 for key in stats.keys)
+    del box
+    gc.collect()
+    assert ref() is None
+
+
+def test_sampling():
+    profiler = MemoProfiler(HERE, sample_every=10)
+    with profiler:
+        for _ in range(100):
+            square(3)
+
+    stats = next(s for s in profiler.stats.values() if s and s.name == "square")
+    assert (stats.calls, stats.sampled, stats.repeats) == (100, 10, 9)
+
+
+def test_run_script(tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text(
+        "import sys\n"
+        "def area(r):\n"
+        "    return 3.14 * r * r\n"
+        "for _ in range(50):\n"
+        "    area(2)\n"
+        "sys.exit(3)\n"
+    )
+    profiler = MemoProfiler(str(tmp_path))
+    assert profiler.run_script(str(script)) == 3
+
+    report = profiler.report()
+    assert report[0]["name"] == "area"
+    assert report[0]["calls"] == 50
+    assert report[0]["location"].endswith("script.py:2")
+
+
+def test_run_script_prints_traceback(tmp_path, capsys):
+    script = tmp_path / "script.py"
+    script.write_text("def fail():\n    raise ValueError('boom')\nfail()\n")
+    assert MemoProfiler(str(tmp_path)).run_script(str(script)) == 1
+    err = capsys.readouterr().err
+    assert "Traceback" in err
+    assert "ValueError: boom" in err
+
+
+def test_run_script_ignores_frozen_modules(tmp_path, monkeypatch):
+    # "<frozen ...>" filenames must not resolve to files under the current directory
+    script = tmp_path / "script.py"
+    script.write_text("import json.tool\ndef one():\n    return 1\nfor _ in range(30):\n    one()\n")
+    monkeypatch.chdir(tmp_path)
+    profiler = MemoProfiler(".")
+    assert profiler.run_script(str(script)) == 0
+    assert {s.name for s in profiler.stats.values() if s} == {"one"}
+
+
+def test_closures_are_not_safe(tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text(
+        "def make(k):\n"
+        "    def scaled(x):\n"
+        "        return x * k\n"
+        "    return scaled\n"
+        "f = make(2)\n"
+        "for _ in range(30):\n"
+        "    f(1)\n"
+    )
+    profiler = MemoProfiler(str(tmp_path))
+    profiler.run_script(str(script))
+    report = profiler.report()
+    assert [(c["name"], c["safe"], c["reasons"]) for c in report] == [
+        ("scaled", False, ["reads closure variable 'k'"]),
+    ]
+
+
+def test_function_side_effects():
+    source = (
+        "import random, os as system\n"
+        "SCALE = 2\n"
+        "counter = 0\n"
+        "def pure(x):\n"
+        "    return abs(x) * len(system.sep) + joins(x, x)\n"
+        "def reads_global(x):\n"
+        "    return x + counter\n"
+        "def writes_global(x):\n"
+        "    global counter\n"
+        "    counter = x\n"
+        "@staticmethod\n"
+        "def does_io(path):\n"
+        "    return system.listdir(path)\n"
+        "def noisy():\n"
+        "    return random.random()\n"
+        "def joins(a, b):\n"
+        "    return system.path.join(a, b)\n"
+        "class Rect:\n"
+        "    def area(self):\n"
+        "        return self.w * self.h\n"
+        "    @staticmethod\n"
+        "    def unit(self):\n"
+        "        return self.w\n"
+    )
+    effects = CodeInspector(source).function_side_effects()
+    assert effects[("pure", 4)] == []
+    assert effects[("reads_global", 6)] == ["reads global 'counter'"]
+    assert effects[("writes_global", 8)] == ["declares global counter"]
+    assert effects[("does_io", 11)] == ["performs I/O (os.listdir)"]
+    assert effects[("noisy", 14)] == ["is non-deterministic (random.random)"]
+    assert effects[("joins", 16)] == []
+    assert effects[("area", 19)] == ["reads instance state 'self.w'", "reads instance state 'self.h'"]
+    assert effects[("unit", 21)] == []
+
+
+def test_global_reads():
+    source = (
+        "TABLE = {}\n"
+        "SCALE = 2\n"
+        "def setup():\n"
+        "    global config\n"
+        "    config = {}\n"
+        "def scaled(x):\n"
+        "    return x * SCALE\n"
+        "def cached(x):\n"
+        "    return TABLE.get(x)\n"
+        "def configured(x):\n"
+        "    return config[x]\n"
+        "def from_main(x):\n"
+        "    return x + limit\n"
+        "def local_only(items):\n"
+        "    total = 0\n"
+        "    for item in items:\n"
+        "        total += item\n"
+        "    try:\n"
+        "        pass\n"
+        "    except ValueError as error:\n"
+        "        return error\n"
+        "    return [y for y in items if y], (lambda z: z)(total)\n"
+        "@decorate(option)\n"
+        "def decorated(x=default):\n"
+        "    return x\n"
+        "def outer(k):\n"
+        "    def inner(x):\n"
+        "        return x * k\n"
+        "    return inner\n"
+        "if __name__ == '__main__':\n"
+        "    with open('f') as handle:\n"
+        "        limit = 3\n"
+    )
+    effects = CodeInspector(source).function_side_effects()
+    assert effects[("scaled", 6)] == ["reads global 'SCALE'"]
+    assert effects[("cached", 8)] == ["reads global 'TABLE'"]
+    assert effects[("configured", 10)] == ["reads global 'config'"]
+    assert effects[("from_main", 12)] == ["reads global 'limit'"]
+    assert effects[("local_only", 14)] == []
+    assert effects[("decorated", 23)] == []
+    assert effects[("outer", 26)] == []
+    assert effects[("inner", 27)] == ["reads closure variable 'k'"]
@@ -0,0 +1,191 @@
+import ast
+import json
+import os
+
+import pytest
+
+from greenkode import rules
+from greenkode.analyzer import CodeInspector
+from greenkode.rules import RuleIndex, RulePatternError, CompiledRule
+
+SCENARIOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+
+
+def ids(source, **kwargs):
+    return [(s["id"], s["line"]) for s in CodeInspector(source, **kwargs).analyze()]
+
+
+def test_builtin_rules_are_declarative():
+    index = rules.load_rule_index()
+    for rule_id in ("GK001", "GK002", "GK003", "GK004"):
+        assert "match" in index.rules[rule_id]
+    assert [r.id for r in index.by_type[ast.Call]] == ["GK004"]
+
+
+def test_builtin_rules_on_scenario_files():
+    assert ids(os.path.join(SCENARIOS, "dirty_code.py")) == [("GK001", 8)]
+    assert ids(os.path.join(SCENARIOS, "green_code.py")) == []
+
+
+def test_builtin_rules_on_loop_patterns():
+    source = (
+        "import re\n"
+        "s = ''\n"
+        "for i in range(10):\n"
+        "    s += 'a'\n"
+        "    re.search('a', s)\n"
+        "    for j in range(5):\n"
+        "        pass\n"
+    )
+    assert ids(source) == [("GK003", 4), ("GK004", 5), ("GK001", 6)]
+
+
+def test_aliases_are_resolved():
+    source = (
+        "import re as r\n"
+        "from re import search\n"
+        "for x in y:\n"
+        "    r.match('a', x)\n"
+        "    search('a', x)\n"
+        "    x.search('a')\n"
+    )
+    assert ids(source) == [("GK004", 4), ("GK004", 5)]
+
+
+def test_nested_loop_depth_in_message():
+    source = "for a in b:\n    for c in d:\n        while e:\n            pass\n"
+    messages = [s["message"] for s in CodeInspector(source).analyze()]
+    assert "O(n^2)" in messages[0]
+    assert "O(n^3)" in messages[1]
+
+
+def test_function_imports_do_not_leak_into_other_scopes():
+    source = (
+        "def a():\n"
+        "    from re import search\n"
+        "def b(search, items):\n"
+        "    for x in items:\n"
+        "        search(x)\n"
+    )
+    assert ids(source) == []
+
+
+def test_detect_methods_accept_starting_loop_context():
+    inspector = CodeInspector("for a in b:\n    pass\nx = re.match('a', 'b')\n")
+    inspector.detect_nested_loops(inspector.tree, depth=1)
+    inspector.detect_loop_inefficiencies(inspector.tree.body[1], in_loop=True)
+    assert [(s["id"], s["line"]) for s in inspector.suggestions] == [("GK001", 1), ("GK004", 3)]
+
+
+def test_heavy_import_matches_each_module():
+    source = "import os, numpy.linalg, pandas as pd\n"
+    messages = [s["message"] for s in CodeInspector(source).analyze()]
+    assert messages == [
+        "Heavy library 'numpy.linalg' imported.",
+        "Heavy library 'pandas' imported.",
+    ]
+
+
+def test_user_rule_file(tmp_path):
+    rule_file = tmp_path / "rules.json"
+    rule_file.write_text(json.dumps([{
+        "id": "USR001",
+        "name": "Sleep in Loop",
+        "severity": "Low",
+        "description": "'{call}' called inside a loop.",
+        "remediation": "Use an event or a scheduler.",
+        "match": {"call": "time.*", "inside_loop": True},
+    }]))
+    source = "from time import sleep\nsleep(1)\nwhile True:\n    sleep(1)\n"
+    suggestions = CodeInspector(source, rule_files=[str(rule_file)]).analyze()
+    assert [(s["id"], s["line"], s["message"]) for s in suggestions] == [
+        ("USR001", 4, "'time.sleep' called inside a loop."),
+    ]
+
+
+def test_entry_point_rule_pack(monkeypatch):
+    class FakeEntryPoint:
+        name = "fake"
+
+        def load(self):
+            return lambda: [{
+                "id": "EP001", "name": "Print", "severity": "Low",
+                "description": "print() call.", "remediation": "Use logging.",
+                "match": {"call": "print"},
+            }]
+
+    monkeypatch.setattr(rules, "_iter_entry_points", lambda group: [FakeEntryPoint()])
+    rules.load_rule_index.cache_clear()
+    try:
+        assert ids("print(1)\n") == [("EP001", 1)]
+    finally:
+        rules.load_rule_index.cache_clear()
+
+
+def rule(**overrides):
+    base = {
+        "id": "BAD", "name": "Bad", "severity": "Low",
+        "description": "Bad rule.", "remediation": "Fix it.",
+    }
+    base.update(overrides)
+    return base
+
+
+@pytest.mark.parametrize("pattern", [
+    {"inside_loop": True},
+    {"node": "NotANode"},
+    {"node": "stmt"},
+    {"node": "expr"},
+    {"node": "AST"},
+    {"node": "Str"},
+    {"node": "Num"},
+    {"node": "Call", "colour": "red"},
+    {"node": "Call", "any": [{"node": "Name"}]},
+    {"node": "For", "min_loop_depth": "one"},
+    {"node": "For", "inside_loop": "yes"},
+    {"node": ["For", {"node": "While"}]},
+    {"call": ["print", 3]},
+    {"node": "Call", "any": ["print"]},
+])
+def test_invalid_patterns(pattern):
+    with pytest.raises(RulePatternError):
+        CompiledRule(rule(match=pattern))
+
+
+@pytest.mark.parametrize("bad_rule", [
+    {"name": "No id", "severity": "Low", "description": "x", "remediation": "x", "match": {"call": "print"}},
+    rule(name=None, match={"call": "print"}),
+    rule(description="unbalanced {", match={"call": "print"}),
+    rule(remediation=["not", "a", "string"]),
+    "not a rule",
+])
+def test_invalid_rule_metadata(bad_rule):
+    with pytest.raises(RulePatternError):
+        rules.validate_rule(bad_rule)
+
+
+def test_constant_is_a_concrete_node_type():
+    assert CompiledRule(rule(match={"node": "Constant"})).node_types == (ast.Constant,)
+
+
+def test_invalid_rule_is_skipped(capsys):
+    index = RuleIndex([rule(match={"node": "NotANode"})])
+    assert index.by_type == {}
+    assert "BAD" in capsys.readouterr().out
+
+
+def test_malformed_user_rules_do_not_break_analysis(tmp_path, capsys):
+    rule_file = tmp_path / "rules.json"
+    rule_file.write_text(json.dumps([
+        rule(id="U1", match={"node": "For", "min_loop_depth": "one"}),
+        {"name": "No id", "match": {"call": "print"}},
+        rule(id="U2", match={"node": ["For", {}]}),
+        rule(id="U3", match={"call": ["print", 3]}),
+        {"id": "U4", "match": {"call": "print"}},
+        rule(id="GK004", match={"call": 1}),
+    ]))
+    source = "import re\nfor x in y:\n    print(re.match('a', x))\n"
+    assert ids(source, rule_files=[str(rule_file)]) == [("GK004", 3)]
+    out = capsys.readouterr().out
+    for rule_id in ("U1", "U2", "U3", "U4", "<missing id>"):
+        assert rule_id in out